@@ -1,8 +1,9 @@
+from itertools import groupby
 from .Exceptions import BFSyntaxError, BFSemanticError
 from .FunctionCompiler import FunctionCompiler
 from .Functions import check_function_exists, get_function_object, insert_function_object
-from .General import is_token_literal, get_literal_token_code, unpack_literal_tokens_to_array_dimensions
-from .Globals import get_global_variables_size, get_variable_size, get_variable_dimensions, insert_global_variable, create_variable_from_definition
+from .General import is_token_literal, get_literal_token_code, get_literal_token_value, get_literal_value_code, unpack_literal_tokens_to_array_dimensions
+from .Globals import get_global_variables_size, get_variable_size, get_variable_dimensions, insert_global_variable, create_variable, create_variable_from_definition
 from .Lexical_analyzer import analyze
 from .Optimizer import optimize
 from .LibraryFunctionCompiler import insert_library_functions
@@ -22,12 +23,20 @@ class Compiler:
         # Optionally optimize the tokens
         if optimize_code:
             optimize(tokens)
-        # Initialize the parser with the tokens
-        self.parser = Parser(tokens)
+        # Initialize the parser with the tokens. They are not modified from here on, so keep them in a tuple
+        self.parser = Parser(tuple(tokens))
+        # Map (type of the definition, token after its ID) to the method that compiles that global definition
+        self.global_definition_handlers = {
+            (Token.VOID, Token.LPAREN): self.compile_function_definition,
+            (Token.INT, Token.LPAREN): self.compile_function_definition,
+            (Token.INT, Token.SEMICOLON): self.compile_global_variable_declaration,
+            (Token.INT, Token.ASSIGN): self.compile_global_variable_definition,
+            (Token.INT, Token.LBRACK): self.compile_global_variable_definition,
+        }
 
     def create_function_object(self):
         # Create a FunctionCompiler object for a function definition
-        if self.parser.current_token().type not in [Token.VOID, Token.INT]:
+        if self.parser.current_token().type not in (Token.VOID, Token.INT):
             raise BFSemanticError("Function return type can be either void or int, not '%s'" % str(self.parser.current_token()))
 
         self.parser.check_next_tokens_are([Token.ID, Token.LPAREN])
@@ -38,64 +47,88 @@ class Compiler:
         self.parser.check_next_token_is(Token.LBRACE, starting_index=RPAREN_index)
         RBRACE_index = self.parser.find_matching(starting_index=RPAREN_index + 1)
 
-        # Extract the tokens for the function and create a FunctionCompiler object
-        function_tokens = self.parser.tokens[self.parser.current_token_index:RBRACE_index + 1]
+        # Create a FunctionCompiler object over the function's tokens (without copying them)
+        function = FunctionCompiler(function_name, self.parser.tokens, self.parser.current_token_index, RBRACE_index + 1)
         self.parser.advance_to_token_at_index(RBRACE_index + 1)
-        function = FunctionCompiler(function_name, function_tokens)
         return function
 
+    def compile_function_definition(self):
+        # Create and insert the function object. Functions are compiled only when called, so there is no code to return
+        function = self.create_function_object()
+        insert_function_object(function)
+        return ''
+
+    def compile_global_variable_declaration(self):
+        # Fast path for the most common global definition: "int ID;" (not an array, and not initialized)
+        # Its cell is already zero, so the only code needed is advancing the pointer to after it
+        parser = self.parser
+        insert_global_variable(create_variable(parser.next_token().data, Token.INT, [1]))
+        parser.advance_token(amount=3)  # Skip INT ID SEMICOLON
+        return '>'
+
     def compile_global_variable_definition(self):
         # Compile a global variable definition and return the initialization code
-        self.parser.check_current_tokens_are([Token.INT, Token.ID])
-        ID_token = self.parser.next_token()
-        variable = create_variable_from_definition(self.parser, advance_tokens=True)
+        parser = self.parser
+        parser.check_current_tokens_are([Token.INT, Token.ID])
+        ID_token = parser.next_token()
+        variable = create_variable_from_definition(parser, advance_tokens=True)
         insert_global_variable(variable)
+        variable_size = get_variable_size(variable)
 
-        ZERO_CELLS_BEFORE_USE = False
-        code = '[-]' if ZERO_CELLS_BEFORE_USE else ''
+        # Global variables are initialized when the program starts, while the tape is still zeroed
+        # so there is no need to zero their cells before use
+        code = []
 
-        if get_variable_size(variable) > 1:  # It's an array
-            if self.parser.current_token().type == Token.SEMICOLON:
-                self.parser.advance_token()  # Skip SEMICOLON
-                code = (code + '>') * get_variable_size(variable)  # Advance to after this variable
-                return code
-            elif self.parser.current_token().type == Token.ASSIGN and self.parser.current_token().data == "=":
-                self.parser.advance_token()  # Skip ASSIGN
+        token = parser.current_token()
+        if variable_size > 1:  # It's an array
+            if token.type == Token.SEMICOLON:
+                parser.advance_token()  # Skip SEMICOLON
+                return '>' * variable_size  # Advance to after this variable
+            elif token.type == Token.ASSIGN and token.data == "=":
+                parser.advance_token()  # Skip ASSIGN
 
-                if self.parser.current_token().type not in [Token.LBRACE, Token.STRING]:
-                    raise BFSyntaxError("Expected LBRACE or STRING at '%s'" % self.parser.current_token())
+                token = parser.current_token()
+                if token.type not in (Token.LBRACE, Token.STRING):
+                    raise BFSyntaxError("Expected LBRACE or STRING at '%s'" % token)
 
-                literal_tokens_list = self.parser.compile_array_initialization_list()
-                self.parser.check_current_token_is(Token.SEMICOLON)
-                self.parser.advance_token()  # Skip SEMICOLON
+                literal_tokens_list = parser.compile_array_initialization_list()
+                parser.check_current_token_is(Token.SEMICOLON)
+                parser.advance_token()  # Skip SEMICOLON
 
                 array_dimensions = get_variable_dimensions(variable)
                 unpacked_literals_list = unpack_literal_tokens_to_array_dimensions(ID_token, array_dimensions, literal_tokens_list)
 
-                for literal in unpacked_literals_list:
-                    code += get_literal_token_code(literal)  # Evaluate this literal and point to next array element
-                return code
+                # Emit each run of equal literals at once, since they all compile to the same code
+                literal_values = (get_literal_token_value(literal) for literal in unpacked_literals_list)
+                for value, run in groupby(literal_values):
+                    run_length = sum(1 for _ in run)
+                    if value == 0:
+                        code.append('>' * run_length)  # The cells are already zero, so just advance the pointer
+                    else:
+                        code.append(get_literal_value_code(value) * run_length)  # Evaluate the literals and point to after them
+                return ''.join(code)
             else:
-                raise BFSyntaxError("Unexpected %s in array definition. Expected SEMICOLON (;) or ASSIGN (=)" % self.parser.current_token())
+                raise BFSyntaxError("Unexpected %s in array definition. Expected SEMICOLON (;) or ASSIGN (=)" % token)
 
-        elif self.parser.current_token().type == Token.SEMICOLON:  # No need to initialize
-            self.parser.advance_token()  # Skip SEMICOLON
-            code += '>'  # Advance to after this variable
+        elif token.type == Token.SEMICOLON:  # An array of size 1 (e.g int x[1];) - no need to initialize
+            parser.advance_token()  # Skip SEMICOLON
+            code.append('>')  # Advance to after this variable
         else:
-            self.parser.check_current_token_is(Token.ASSIGN)
-            if self.parser.current_token().data != "=":
-                raise BFSyntaxError("Unexpected %s when initializing global variable. Expected ASSIGN (=)" % self.parser.current_token())
-            self.parser.advance_token()  # Skip ASSIGN
+            parser.check_current_token_is(Token.ASSIGN)
+            if token.data != "=":
+                raise BFSyntaxError("Unexpected %s when initializing global variable. Expected ASSIGN (=)" % token)
+            parser.advance_token()  # Skip ASSIGN
 
-            if not is_token_literal(self.parser.current_token()):
-                raise BFSemanticError("Unexpected '%s'. expected literal (NUM | CHAR | TRUE | FALSE )" % str(self.parser.current_token()))
+            token = parser.current_token()
+            if not is_token_literal(token):
+                raise BFSemanticError("Unexpected '%s'. expected literal (NUM | CHAR | TRUE | FALSE )" % str(token))
 
-            code += get_literal_token_code(self.parser.current_token())
+            code.append(get_literal_token_code(token))
 
-            self.parser.check_next_token_is(Token.SEMICOLON)
-            self.parser.advance_token(amount=2)  # Skip (NUM|CHAR|TRUE|FALSE) SEMICOLON
+            parser.check_next_token_is(Token.SEMICOLON)
+            parser.advance_token(amount=2)  # Skip (NUM|CHAR|TRUE|FALSE) SEMICOLON
 
-        return code
+        return ''.join(code)
 
     def process_global_definitions(self):
         """
@@ -103,30 +136,40 @@ class Compiler:
         Create FunctionCompiler objects for functions and compile global variables.
         Returns initialization code for global variables.
         """
-        code = ''
-        token = self.parser.current_token()
-        while token is not None and token.type in [Token.VOID, Token.INT, Token.SEMICOLON]:
-            if token.type == Token.SEMICOLON:  # Can have random semicolons
-                self.parser.advance_token()
-                token = self.parser.current_token()
+        # Bind the parser and the token types to locals, since they are looked up for every top-level token
+        # The token index is also kept in a local, and synced with the parser only around the calls that parse a definition
+        parser = self.parser
+        tokens, end_index = parser.tokens, parser.end_index
+        SEMICOLON, ID = Token.SEMICOLON, Token.ID
+        definition_types = (Token.VOID, Token.INT, SEMICOLON)
+        definition_handlers = self.global_definition_handlers
+
+        code = []
+        i = parser.current_token_index
+        while i < end_index:
+            token = tokens[i]
+            if token.type not in definition_types:
+                break
+            if token.type == SEMICOLON:  # Can have random semicolons
+                i += 1
                 continue
-            self.parser.check_next_token_is(Token.ID)
+            parser.check_next_token_is(ID, starting_index=i)
 
-            if self.parser.next_token(next_amount=2).type == Token.LPAREN:
-                function = self.create_function_object()
-                insert_function_object(function)
-            elif token.type is Token.INT and self.parser.next_token(next_amount=2).type in [Token.SEMICOLON, Token.ASSIGN, Token.LBRACK]:
-                code += self.compile_global_variable_definition()
-            else:
-                raise BFSyntaxError("Unexpected '%s' after '%s'. Expected '(' (function definition) or one of: '=', ';', '[' (global variable definition)" % (str(self.parser.next_token(next_amount=2)), str(self.parser.next_token())))
+            token_after_id = parser.token_at_index(i + 2)
+            handler = definition_handlers.get((token.type, token_after_id.type))
+            if handler is None:
+                raise BFSyntaxError("Unexpected '%s' after '%s'. Expected '(' (function definition) or one of: '=', ';', '[' (global variable definition)" % (str(token_after_id), str(tokens[i + 1])))
 
-            token = self.parser.current_token()
+            parser.advance_to_token_at_index(i)
+            code.append(handler())
+            i = parser.current_token_index
 
-        if self.parser.current_token() is not None:  # We have not reached the last token
-            untouched_tokens = [str(t) for t in self.parser.tokens[self.parser.current_token_index:]]
+        parser.advance_to_token_at_index(i)
+        if i < end_index:  # We have not reached the last token
+            untouched_tokens = [str(t) for t in tokens[i:]]
             raise BFSyntaxError("Did not reach the end of the code. Untouched tokens:\n%s" % untouched_tokens)
 
-        return code
+        return ''.join(code)
 
     def compile(self):
         # Insert library functions and process global definitions
@@ -135,9 +178,10 @@ class Compiler:
 
         # Ensure the main function exists and get its code
         check_function_exists(Token(Token.ID, 0, 0, "main"), 0)
-        code += get_function_object("main").get_code(get_global_variables_size())
-        code += "<" * get_global_variables_size()  # Point to the first cell to end the program nicely
-        return code
+        global_variables_size = get_global_variables_size()
+        main_code = get_function_object("main").get_code(global_variables_size)
+        # Point to the first cell to end the program nicely
+        return ''.join((code, main_code, "<" * global_variables_size))
 
 
 def compile(code, optimize_code=False):
@@ -1,14 +1,14 @@
+# Common base for the byteflow compiler's exceptions, so callers can catch both with a single 'except BFError'
+class BFError(Exception):
+    # No per-instance attributes are added - the message is kept in Exception.args
+    __slots__ = ()
+
+
 # Custom exception for syntax errors in the byteflow compiler
-class BFSyntaxError(Exception):
-    # The 'pass' statement is used here to indicate that no additional
-    # functionality or attributes are being added to this custom exception.
-    # It serves as a placeholder to define the exception class.
-    pass
+class BFSyntaxError(BFError):
+    __slots__ = ()
 
 
 # Custom exception for semantic errors in the byteflow compiler
-class BFSemanticError(Exception):
-    # The 'pass' statement is used here to indicate that no additional
-    # functionality or attributes are being added to this custom exception.
-    # It serves as a placeholder to define the exception class.
-    pass
+class BFSemanticError(BFError):
+    __slots__ = ()
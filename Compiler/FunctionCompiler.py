@@ -1,11 +1,9 @@
-from collections import namedtuple
-from functools import reduce
 from .Exceptions import BFSyntaxError, BFSemanticError
 from .Functions import check_function_exists, get_function_object
 from .General import get_variable_dimensions_from_token, get_move_to_return_value_cell_code, get_print_string_code, get_variable_from_ID_token
-from .General import get_literal_token_value, process_switch_cases, is_token_literal
+from .General import get_literal_token_value, try_get_literal_token_value, process_switch_cases, is_token_literal, LITERAL_TYPES
 from .Globals import create_variable_from_definition, get_global_variables, get_variable_size, is_variable_array
-from .Node import NodeToken, NodeTernary, NodeArraySetElement, NodeUnaryPrefix, NodeUnaryPostfix, NodeArrayGetElement, NodeFunctionCall, NodeArrayAssignment
+from .Node import NodeToken, get_NUM_node, NodeTernary, NodeArraySetElement, NodeUnaryPrefix, NodeUnaryPostfix, NodeArrayGetElement, NodeFunctionCall, NodeArrayAssignment
 from .Parser import Parser
 from .Token import Token
 
@@ -20,32 +18,85 @@ This is handled in the get_code() function.
 FunctionCompiler holds tokens for the function to compile it as needed.
 """
 
+# precedence of the binary operators - a higher precedence binds more tightly
+LOGICAL_OR_PRECEDENCE = 1
+RELATIONAL_PRECEDENCE = 6
+BINARY_OPERATORS_PRECEDENCE = {
+    Token.OR: LOGICAL_OR_PRECEDENCE,
+    Token.AND: 2,
+    Token.BITWISE_OR: 3,
+    Token.BITWISE_XOR: 4,
+    Token.BITWISE_AND: 5,
+    Token.RELOP: RELATIONAL_PRECEDENCE,
+    Token.BITWISE_SHIFT: 7,
+}
+BINOP_PRECEDENCE = {"+": 8, "-": 8, "*": 9, "/": 9, "%": 9}  # additive and multiplicative
+
+# operators and token types that are checked while parsing expressions
+UNARY_SIGN_OPERATORS = frozenset(("+", "-"))
+UNARY_PREFIX_TYPES = frozenset((Token.NOT, Token.BITWISE_NOT, Token.BINOP))
+UNARY_INCREMENT_TYPES = frozenset((Token.INCREMENT, Token.DECREMENT, Token.UNARY_MULTIPLICATIVE))  # ++, -- and UNARY_MULTIPLICATIVE (**, //, %%)
+ARRAY_INITIALIZATION_TYPES = frozenset((Token.LBRACE, Token.STRING))
+SWITCH_CASE_TYPES = frozenset((Token.CASE, Token.DEFAULT))
+CASE_END_TYPES = SWITCH_CASE_TYPES | {Token.RBRACE}  # the tokens that end the statements of a switch case
+CASE_STATEMENTS_END_TYPES = CASE_END_TYPES | {Token.BREAK}  # the tokens that end the statements of a case that are executed
+# the tokens after ID that make a statement that starts with ID an expression (ID = ..., ID[...] = ..., ID++, ...)
+ID_EXPRESSION_STATEMENT_TYPES = frozenset((Token.ASSIGN, Token.LBRACK, Token.INCREMENT, Token.DECREMENT, Token.UNARY_MULTIPLICATIVE))
+
+
+class IDsMap:
+    """
+    The variables of a single scope, and the next cell that is available for a new variable in it
+    """
+    __slots__ = ("next_available_cell", "IDs_dict", "visible_IDs", "shadowed_IDs")
+
+    def __init__(self, next_available_cell, visible_IDs):
+        self.next_available_cell = next_available_cell
+        self.IDs_dict = dict()
+        # all the IDs that are currently visible (of this scope and its outer scopes) - a single dict that is shared by all the
+        # ids maps of the function, so entering a scope doesn't copy the outer scopes' IDs, and finding an ID is a single lookup
+        self.visible_IDs = visible_IDs
+        # ID -> the variable it referred to in visible_IDs before this scope defined it (None if it was not visible)
+        # used for restoring visible_IDs when this scope is removed
+        self.shadowed_IDs = dict()
+
 
 class FunctionCompiler:
-    def __init__(self, name, tokens):
+    __slots__ = ("name", "tokens", "parser", "scopes_variable_definitions", "parsed_variable_definitions", "ids_map_list",
+                 "type", "parameters", "scope_start_index", "return_value_cell")
+
+    def __init__(self, name, tokens, start_index=0, end_index=None):
         """
         Initializes the FunctionCompiler instance.
 
         Args:
             name (str): The name of the function.
-            tokens (list): A list of tokens representing the function.
+            tokens (tuple or list): The tokens containing the function. They are shared, not copied.
+            start_index (int): The index of the function's first token (its return type).
+            end_index (int or None): The index after the function's last token (its RBRACE). None means the end of tokens.
 
         Attributes:
             name (str): The name of the function.
-            tokens (list): A list of tokens representing the function.
-            parser (Parser): An instance of the Parser class initialized with the tokens.
-            ids_map_list (list): A list to store identifier mappings.
+            tokens (tuple or list): The tokens containing the function.
+            parser (Parser): An instance of the Parser class over tokens[start_index:end_index].
+            scopes_variable_definitions (dict or None): Maps the index of each LBRACE to the indices of the variable definitions in its scope, set on the first call to get_code.
+            parsed_variable_definitions (dict): Maps the index of each variable definition that was parsed to its variable.
+            ids_map_list (list): A stack of identifier mappings, one per scope - the current scope is the last one.
             type (str or None): The type of the function, set during process_function_definition.
             parameters (list or None): The parameters of the function, set during process_function_definition.
+            scope_start_index (int or None): The index of the function scope's LBRACE, set during process_function_definition.
             return_value_cell (Any or None): A placeholder for the return value, set on every call to the function.
         """
         self.name = name
         self.tokens = tokens
-        self.parser = Parser(self.tokens)
+        self.parser = Parser(self.tokens, start_index, end_index)
+        self.scopes_variable_definitions = None  # found on the first call to get_code
+        self.parsed_variable_definitions = dict()
         self.ids_map_list = list()
         self.type = None
         self.parameters = None
-        self.process_function_definition()  # sets type and parameters
+        self.scope_start_index = None
+        self.process_function_definition()  # sets type, parameters and scope_start_index
         self.return_value_cell = None  # will be set on every call to this function
 
     def process_function_definition(self):
@@ -61,6 +112,7 @@ class FunctionCompiler:
 
         self.type = function_return_type
         self.parameters = parameters
+        self.scope_start_index = self.parser.current_token_index
 
     def get_code(self, current_stack_pointer):
         """
@@ -68,7 +120,13 @@ class FunctionCompiler:
         - current_stack_pointer points to the next available cell.
         - Create ids map for global variables.
         - Make room for return_value.
+
+        The function is compiled again on every call to it, so the compilation starts from the beginning of the function scope
         """
+        self.parser.advance_to_token_at_index(self.scope_start_index)
+        if self.scopes_variable_definitions is None:  # the first call to this function (a function that is never called is never scanned)
+            self.scopes_variable_definitions = self.parser.find_scopes_variable_definitions()
+        self.ids_map_list = list()
         self.insert_global_variables_to_function_scope()
 
         # self.current_stack_pointer is now equal to the size of the global variables plus 1 (next_available_cell)
@@ -93,11 +151,14 @@ class FunctionCompiler:
 
         Example: For arr[10][5][2], accessing arr[4][3][1] translates to index = (4*(5*2) + 3*2 + 1).
         """
-        ID_token = self.parser.current_token()
-        self.parser.advance_token(2)  # skip ID, LBRACK
+        parser = self.parser
+        LBRACK, RBRACK = Token.LBRACK, Token.RBRACK
+
+        ID_token = parser.current_token()
+        parser.advance_token(2)  # skip ID, LBRACK
         first_index_expression = index_expression = self.expression()  # first dimension
-        self.parser.check_current_token_is(Token.RBRACK)
-        self.parser.advance_token()  # skip RBRACK
+        parser.check_current_token_is(RBRACK)
+        parser.advance_token()  # skip RBRACK
 
         # now handle the next dimensions (if multi-dimensional array)
         dimensions = get_variable_dimensions_from_token(self.ids_map_list, ID_token)
@@ -105,43 +166,61 @@ class FunctionCompiler:
             multiply_token = Token(Token.BINOP, ID_token.line, ID_token.column, data="*")
             add_token = Token(Token.BINOP, ID_token.line, ID_token.column, data="+")
 
+            # following_dimensions_sizes[i] is the size of the dimensions following dimension i (their product)
+            following_dimensions_sizes = [1] * len(dimensions)
+            for i in range(len(dimensions) - 2, -1, -1):
+                following_dimensions_sizes[i] = following_dimensions_sizes[i + 1] * dimensions[i + 1]
+
             # multiply by next dimensions sizes
-            multiply_amount = reduce(lambda x, y: x * y, dimensions[1:])  # size of the following dimensions
-            node_token_multiply_amount = NodeToken(self.ids_map_list, token=Token(Token.NUM, ID_token.line, ID_token.column, data=str(multiply_amount)))
-            index_expression = NodeToken(self.ids_map_list, token=multiply_token, left=first_index_expression, right=node_token_multiply_amount)
+            multiply_amount = following_dimensions_sizes[0]  # size of the following dimensions
+            node_token_multiply_amount = get_NUM_node(multiply_amount)
+            index_expression = self.create_index_calculation_node(multiply_token, first_index_expression, node_token_multiply_amount)
 
             # handle next dimensions
             dimension = 1
             while dimension < len(dimensions):
-                if self.parser.current_token().type != Token.LBRACK:  # too few indexes given...
+                if parser.current_token().type != LBRACK:  # too few indexes given...
                     if dimension == 1:
                         return first_index_expression  # allow use of only one dimension for multi-dimensional array
                     raise BFSemanticError("%s is a %s-dimensional array, but only %s dimension(s) given as index" %
                                           (str(ID_token), len(dimensions), dimension))
-                self.parser.check_current_token_is(Token.LBRACK)
-                self.parser.advance_token()  # skip LBRACK
+                assert parser.current_token().type == LBRACK  # checked above
+                parser.advance_token()  # skip LBRACK
                 exp = self.expression()
 
-                self.parser.check_current_token_is(Token.RBRACK)
-                self.parser.advance_token()  # skip RBRACK
+                parser.check_current_token_is(RBRACK)
+                parser.advance_token()  # skip RBRACK
 
                 # current_dimension_index *= size_of_following_dimensions
                 if dimension + 1 < len(dimensions):  # not last dimension - need to multiply and add
-                    multiply_amount = reduce(lambda x, y: x * y, dimensions[dimension + 1:])  # size of the following dimensions
-                    node_token_multiply_amount = NodeToken(self.ids_map_list, token=Token(Token.NUM, ID_token.line, ID_token.column, data=str(multiply_amount)))
-                    multiply_node = NodeToken(self.ids_map_list, token=multiply_token, left=exp, right=node_token_multiply_amount)
+                    multiply_amount = following_dimensions_sizes[dimension]  # size of the following dimensions
+                    node_token_multiply_amount = get_NUM_node(multiply_amount)
+                    multiply_node = self.create_index_calculation_node(multiply_token, exp, node_token_multiply_amount)
 
                     # prev_dimensions_index += current_dimension_index
-                    index_expression = NodeToken(self.ids_map_list, token=add_token, left=index_expression, right=multiply_node)
+                    index_expression = self.create_index_calculation_node(add_token, index_expression, multiply_node)
                 else:  # last dimension - no need to multiply, just add
-                    index_expression = NodeToken(self.ids_map_list, token=add_token, left=index_expression, right=exp)
+                    index_expression = self.create_index_calculation_node(add_token, index_expression, exp)
                 dimension += 1
 
-        if self.parser.current_token().type == Token.LBRACK:  # too many indexes given...
+        if parser.current_token().type == LBRACK:  # too many indexes given...
             raise BFSemanticError("%s is a %s-dimensional array. Unexpected %s" %
-                                  (str(ID_token), len(dimensions), self.parser.current_token()))
+                                  (str(ID_token), len(dimensions), parser.current_token()))
         return index_expression
 
+    def create_index_calculation_node(self, op_token, left, right):
+        """
+        Create the node for "left op right" (op is either * or +) when calculating a multi-dimensional array index.
+        If both operands are literals, the result is calculated at compilation time and a single NUM node is returned,
+        so no code is generated for the calculation. E.g arr[4][3][1] of int arr[10][5][2] gets the index NUM 47.
+        """
+        if isinstance(left, NodeToken) and is_token_literal(left.token) and isinstance(right, NodeToken) and is_token_literal(right.token):
+            left_value, right_value = get_literal_token_value(left.token), get_literal_token_value(right.token)
+            value = left_value * right_value if op_token.data == "*" else left_value + right_value
+            return get_NUM_node(value)
+
+        return NodeToken(self.ids_map_list, token=op_token, left=left, right=right)
+
     def get_token_after_array_access(self, offset=0):
         # in case we have: "ID[a][b][c]...[z] next_token", return "next_token"
         idx = self.parser.current_token_index + offset
@@ -159,11 +238,12 @@ class FunctionCompiler:
         # int id[a][b][c]... = "\1\2\3...";
         # int id[a][b][c]... = {{1, 2}, {3, 4}, ...};
         # or array assignment: id = {1, 2, 3, ...};
-        self.parser.check_current_token_is(Token.ASSIGN)
-        if self.parser.current_token().data != "=":
-            raise BFSyntaxError("Unexpected %s when assigning array. Expected ASSIGN (=)" % self.parser.current_token())
+        assign_token = self.parser.current_token()
+        assert assign_token.type == Token.ASSIGN  # the callers only get here when the current token is ASSIGN
+        if assign_token.data != "=":
+            raise BFSyntaxError("Unexpected %s when assigning array. Expected ASSIGN (=)" % assign_token)
 
-        if self.parser.next_token().type not in [Token.LBRACE, Token.STRING]:
+        if self.parser.next_token().type not in ARRAY_INITIALIZATION_TYPES:
             raise BFSyntaxError("Expected LBRACE or STRING at '%s'" % self.parser.next_token())
 
         self.parser.advance_token()  # skip to LBRACE or STRING
@@ -210,32 +290,41 @@ class FunctionCompiler:
         every function assumes that these cells exist
         """
 
-        next_available_cell = 0 if len(self.ids_map_list) == 0 else self.ids_map_list[0].next_available_cell
-
-        ids_map = namedtuple("ids_map", ["next_available_cell", "IDs_dict"])
-        ids_map.next_available_cell = next_available_cell
-        ids_map.IDs_dict = dict()
+        if len(self.ids_map_list) == 0:
+            ids_map = IDsMap(0, dict())
+        else:
+            outer_ids_map = self.ids_map_list[-1]
+            ids_map = IDsMap(outer_ids_map.next_available_cell, outer_ids_map.visible_IDs)
 
-        self.ids_map_list.insert(0, ids_map)
+        self.ids_map_list.append(ids_map)
 
     def remove_ids_map(self):
-        self.ids_map_list.pop(0)
+        # the removed scope's IDs are no longer visible, and the outer scopes' IDs that they shadowed are visible again
+        ids_map = self.ids_map_list.pop()
+        visible_IDs = ids_map.visible_IDs
+        for ID, shadowed_variable in ids_map.shadowed_IDs.items():
+            if shadowed_variable is None:
+                del visible_IDs[ID]
+            else:
+                visible_IDs[ID] = shadowed_variable
 
     def insert_to_ids_map(self, variable):
-        ids_map = self.ids_map_list[0]
+        ids_map = self.ids_map_list[-1]
 
         self.check_id_doesnt_exist(variable.name)
 
         variable.cell_index = ids_map.next_available_cell
         ids_map.next_available_cell += get_variable_size(variable)
         ids_map.IDs_dict[variable.name] = variable
+        ids_map.shadowed_IDs[variable.name] = ids_map.visible_IDs.get(variable.name)
+        ids_map.visible_IDs[variable.name] = variable
 
     def reserve_cell_in_ids_map(self):
         """
         reserve cell by increasing the "pointer" of the next available cell
         this is used for making room for return_value cell
         """
-        ids_map = self.ids_map_list[0]
+        ids_map = self.ids_map_list[-1]
         ids_map.next_available_cell += 1
 
     def variables_dict_size(self, variables_dict_index):
@@ -248,54 +337,53 @@ class FunctionCompiler:
         return size
 
     def size_of_variables_current_scope(self):
-        return self.variables_dict_size(0)
+        return self.variables_dict_size(-1)
 
     def size_of_global_variables(self):
-        return self.variables_dict_size(-1)
+        return self.variables_dict_size(0)
 
     def increase_stack_pointer(self, amount=1):
         # sometimes it is needed to increase the stack pointer
         # for example, when compiling "if ... else ...", we need 2 temporary cells before the inner scope code of both the if and the else
         # another example - when evaluating expression list in function call, each expression is evaluated while pointing to a different cell
         # therefore, it is needed to "update" the stack pointer to represent the new pointer
-        self.ids_map_list[0].next_available_cell += amount
+        self.ids_map_list[-1].next_available_cell += amount
 
     def decrease_stack_pointer(self, amount=1):
-        self.ids_map_list[0].next_available_cell -= amount
+        self.ids_map_list[-1].next_available_cell -= amount
 
     def set_stack_pointer(self, new_value):
-        assert new_value >= self.ids_map_list[0].next_available_cell
-        self.ids_map_list[0].next_available_cell = new_value
+        assert new_value >= self.ids_map_list[-1].next_available_cell
+        self.ids_map_list[-1].next_available_cell = new_value
 
     def current_stack_pointer(self):
-        return self.ids_map_list[0].next_available_cell
+        return self.ids_map_list[-1].next_available_cell
 
     def insert_scope_variables_into_ids_map(self):
         # go through all the variable definitions in this scope (not including sub-scopes), and add them to the ids map
         # move the pointer to the next available cell (the one after the last variable declared in this scope)
 
         assert self.parser.current_token().type == Token.LBRACE
+        scope_variable_definitions = self.scopes_variable_definitions[self.parser.current_token_index]
         self.parser.advance_token()
 
-        i = self.parser.current_token_index
-        while i < len(self.tokens):
-            token = self.tokens[i]
-
-            if token.type == Token.INT:
-                if self.tokens[i-2].type != Token.FOR:  # if it is not a definition inside a FOR statement (for (int i = 0...))
-                    variable = create_variable_from_definition(self.parser, index=i)
-                    self.insert_to_ids_map(variable)
-
-            elif token.type == Token.LBRACE:
-                i = self.parser.find_matching(starting_index=i)
-
-            elif token.type == Token.RBRACE:
-                break  # we have reached the end of the scope
-
-            i += 1
+        # the indices of the definitions in this scope were found in advance (see Parser.find_scopes_variable_definitions)
+        for i in scope_variable_definitions:
+            variable = self.get_variable_from_definition_at(i)
+            self.insert_to_ids_map(variable)
 
         return ">" * self.size_of_variables_current_scope()  # advance pointer to the next available cell
 
+    def get_variable_from_definition_at(self, index):
+        # returns the variable of the definition at index (without advancing the parser)
+        # the definition is parsed only the first time, since this function is compiled again on every call to it
+        # the same variable is used on every call (like the parameters) - its cell_index is set again when it is inserted into an ids map
+        variable = self.parsed_variable_definitions.get(index)
+        if variable is None:
+            variable = create_variable_from_definition(self.parser, index=index)
+            self.parsed_variable_definitions[index] = variable
+        return variable
+
     def enter_scope(self):
         # create an ids map to the current scope, and then inserts the scope variables into it
         self.add_ids_map()
@@ -318,16 +406,16 @@ class FunctionCompiler:
         for parameter in parameters:
             self.insert_to_ids_map(parameter)
 
-        code = '>'  # skip return_value_cell
-        code += self.insert_scope_variables_into_ids_map()
+        code = ['>']  # skip return_value_cell
+        code.append(self.insert_scope_variables_into_ids_map())
         # this inserts scope variables AND moves pointer right, with the amount of BOTH parameters and scope variables
 
-        return code
+        return "".join(code)
 
     def check_id_doesnt_exist(self, ID):
         # make sure that the id does not exist in the current scope
         # used when defining a variable
-        if ID in self.ids_map_list[0].IDs_dict:
+        if ID in self.ids_map_list[-1].IDs_dict:
             raise BFSemanticError("ID %s is already defined" % ID)
 
     # =================
@@ -357,24 +445,30 @@ class FunctionCompiler:
     def literal(self):
         # literal: NUM | CHAR | ID | ID (LBRACK expression RBRACK)+ | TRUE | FALSE | function_call | ( expression )
 
-        token = self.parser.current_token()
+        parser = self.parser
+        token = parser.current_token()
 
-        if token.type == Token.ID and self.parser.next_token().type == Token.LPAREN:
-            return self.function_call()
+        if token.type == Token.ID:
+            next_token_type = parser.next_token().type
+            if next_token_type == Token.LPAREN:
+                return self.function_call()
 
-        if token.type == Token.ID and self.parser.next_token().type == Token.LBRACK:  # array - ID(LBRACK expression RBRACK)+
-            index_expression = self.get_array_index_expression()
-            return NodeArrayGetElement(self.ids_map_list, token, index_expression)
+            if next_token_type == Token.LBRACK:  # array - ID(LBRACK expression RBRACK)+
+                index_expression = self.get_array_index_expression()
+                return NodeArrayGetElement(self.ids_map_list, token, index_expression)
 
-        if is_token_literal(token) or token.type == Token.ID:
-            self.parser.advance_token()
+            parser.advance_token()
+            return NodeToken(self.ids_map_list, token=token)
+
+        if token.type in LITERAL_TYPES:  # same as is_token_literal(token)
+            parser.advance_token()
             return NodeToken(self.ids_map_list, token=token)
 
         if token.type != Token.LPAREN:
             raise BFSyntaxError("Unexpected '%s'. expected literal (NUM | ID | ID(LBRACK expression RBRACK)+ | TRUE | FALSE | function_call | ( expression ))" % str(token))
 
         # ( expression )
-        self.parser.check_current_token_is(Token.LPAREN)
+        assert token.type == Token.LPAREN  # checked above
         self.parser.advance_token()  # skip LPAREN
         exp = self.expression()
         self.parser.check_current_token_is(Token.RPAREN)
@@ -385,11 +479,12 @@ class FunctionCompiler:
     def unary_postfix(self):
         # unary_postfix: literal ( ++ | -- | UNARY_MULTIPLICATIVE)?
 
+        parser = self.parser
         literal = self.literal()
-        token = self.parser.current_token()
+        token = parser.current_token()
 
-        if token.type in [Token.INCREMENT, Token.DECREMENT, Token.UNARY_MULTIPLICATIVE]:
-            self.parser.advance_token()
+        if token.type in UNARY_INCREMENT_TYPES:
+            parser.advance_token()
             new_node = NodeUnaryPostfix(self.ids_map_list, operation=token, literal=literal)
             return new_node
         else:
@@ -398,197 +493,107 @@ class FunctionCompiler:
     def unary_prefix(self):
         # unary_prefix:  ( (!|+|-)* unary_prefix ) | ( ( ++ | -- | UNARY_MULTIPLICATIVE | ~ ) literal ) | unary_postfix
 
-        token = self.parser.current_token()
-
-        if token.type in [Token.NOT, Token.BITWISE_NOT, Token.BINOP]:
-            if token.type == Token.BINOP and token.data not in ["+", "-"]:
-                    raise BFSyntaxError("Expected either + or - as unary prefix instead of token %s" % self.parser.current_token())
-            self.parser.advance_token()
-            unary_prefix = self.unary_prefix()
+        parser = self.parser
+        token = parser.current_token()
 
-            new_node = NodeUnaryPrefix(self.ids_map_list, operation=token, literal=unary_prefix)
-            return new_node
+        # (!|+|-)* - collected in a loop instead of recursing for each of them
+        prefix_tokens = []
+        while token.type in UNARY_PREFIX_TYPES:
+            if token.type == Token.BINOP and token.data not in UNARY_SIGN_OPERATORS:
+                    raise BFSyntaxError("Expected either + or - as unary prefix instead of token %s" % token)
+            prefix_tokens.append(token)
+            parser.advance_token()
+            token = parser.current_token()
 
-        elif token.type in [Token.INCREMENT, Token.DECREMENT, Token.UNARY_MULTIPLICATIVE]:
-            self.parser.advance_token()
+        if token.type in UNARY_INCREMENT_TYPES:
+            parser.advance_token()
             literal = self.literal()
 
-            new_node = NodeUnaryPrefix(self.ids_map_list, operation=token, literal=literal)
-            return new_node
+            n = NodeUnaryPrefix(self.ids_map_list, operation=token, literal=literal)
 
         else:
-            return self.unary_postfix()
-
-    def multiplicative(self):
-        # multiplicative: unary_prefix ((MUL|DIV|MOD) unary_prefix)*
-
-        n = self.unary_prefix()
-
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.BINOP and token.data in ["*", "/", "%"]:
-            self.parser.advance_token()
-            next_factor = self.unary_prefix()
-
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_factor)
-            n = new_node
-
-            token = self.parser.current_token()
-
-        return n
-
-    def additive(self):
-        # additive: multiplicative ((PLUS|MINUS) multiplicative)*
-
-        n = self.multiplicative()
-
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.BINOP and token.data in ["+", "-"]:
-            self.parser.advance_token()
-            next_term = self.multiplicative()
-
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_term)
-            n = new_node
-
-            token = self.parser.current_token()
+            n = self.unary_postfix()
 
+        # the innermost prefix is the last one
+        for prefix_token in reversed(prefix_tokens):
+            n = NodeUnaryPrefix(self.ids_map_list, operation=prefix_token, literal=n)
         return n
 
-    def shift(self):
-        # shift: additive (<<|>> additive)*
-
-        n = self.additive()
-
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.BITWISE_SHIFT:
-            self.parser.advance_token()
-            next_additive = self.additive()
-
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_additive)
-            n = new_node
-
-            token = self.parser.current_token()
-
-        return n
-
-    def relational(self):
-        # relational: shift (==|!=|<|>|<=|>= shift)?
-
-        a = self.shift()
-
-        token = self.parser.current_token()
-        if token.type != Token.RELOP:  # just an arithmetic expression
-            return a
-
-        self.parser.advance_token()
-        b = self.shift()
-
-        new_node = NodeToken(self.ids_map_list, token=token, left=a, right=b)
-        return new_node
+    def binary_operator_precedence(self, token):
+        # returns the precedence of token if it is a binary operator (see BINARY_OPERATORS_PRECEDENCE), otherwise None
+        if token is None:
+            return None
+        if token.type == Token.BINOP:
+            return BINOP_PRECEDENCE.get(token.data)
+        return BINARY_OPERATORS_PRECEDENCE.get(token.type)
 
-    def bitwise_and(self):
-        # bitwise_and: relational (& relational)*
-
-        n = self.relational()
-
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.BITWISE_AND:
-            self.parser.advance_token()
-            next_relational = self.relational()
-
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_relational)
-            n = new_node
-
-            token = self.parser.current_token()
-
-        return n
-
-    def bitwise_xor(self):
-        # bitwise_xor: bitwise_and (| bitwise_and)*
-
-        n = self.bitwise_and()
-
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.BITWISE_XOR:
-            self.parser.advance_token()
-            next_bitwise_and = self.bitwise_and()
-
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_bitwise_and)
-            n = new_node
-
-            token = self.parser.current_token()
-
-        return n
-
-    def bitwise_or(self):
-        # bitwise_or: bitwise_xor (| bitwise_xor)*
-
-        n = self.bitwise_xor()
-
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.BITWISE_OR:
-            self.parser.advance_token()
-            next_bitwise_xor = self.bitwise_xor()
-
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_bitwise_xor)
-            n = new_node
-
-            token = self.parser.current_token()
-
-        return n
-
-    def logical_and(self):
-        # logical_and: bitwise_or (&& bitwise_or)*
-
-        n = self.bitwise_or()
-
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.AND:
-            self.parser.advance_token()
-            next_bitwise_or = self.bitwise_or()
-
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_bitwise_or)
-            n = new_node
-
-            token = self.parser.current_token()
-
-        return n
+    def binary_operation(self, min_precedence=LOGICAL_OR_PRECEDENCE):
+        """
+        parses the binary operations, from the lowest precedence to the highest:
+        logical_or: logical_and (|| logical_and)*
+        logical_and: bitwise_or (&& bitwise_or)*
+        bitwise_or: bitwise_xor (| bitwise_xor)*
+        bitwise_xor: bitwise_and (^ bitwise_and)*
+        bitwise_and: relational (& relational)*
+        relational: shift (==|!=|<|>|<=|>= shift)?
+        shift: additive (<<|>> additive)*
+        additive: multiplicative ((PLUS|MINUS) multiplicative)*
+        multiplicative: unary_prefix ((MUL|DIV|MOD) unary_prefix)*
+
+        this is done by precedence climbing - only operators whose precedence is at least min_precedence are parsed here,
+        and the right operand of each operator is parsed by a recursive call that only parses operators of higher precedence
+        so a single call handles all the levels, instead of going through a method for each level
+        """
+        parser = self.parser
 
-    def logical_or(self):
-        # logical_or: logical_and (|| logical_and)*
+        n = self.unary_prefix()
+        last_precedence = None  # the precedence of the last operator parsed in this call
 
-        n = self.logical_and()
+        token = parser.current_token()
+        precedence = self.binary_operator_precedence(token)
+        while precedence is not None and precedence >= min_precedence:
+            if last_precedence is not None:
+                # relational is not associative - its operands cannot be relational expressions (without parentheses)
+                # in that case we stop here, and also in all the calls that parse lower precedence operators
+                if precedence > last_precedence or (precedence == last_precedence == RELATIONAL_PRECEDENCE):
+                    break
 
-        token = self.parser.current_token()
-        while token is not None and token.type == Token.OR:
-            self.parser.advance_token()
-            next_and = self.logical_and()
+            parser.advance_token()
+            right = self.binary_operation(precedence + 1)
 
-            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=next_and)
+            new_node = NodeToken(self.ids_map_list, token=token, left=n, right=right)
             n = new_node
+            last_precedence = precedence
 
-            token = self.parser.current_token()
+            token = parser.current_token()
+            precedence = self.binary_operator_precedence(token)
 
         return n
 
     def ternary_expression(self):
         # ternary_expression: logical_or (? expression : ternary_expression)?
-        n = self.logical_or()
-        if self.parser.current_token().type != Token.TERNARY:
-            return n
-
-        self.parser.advance_token()  # skip ?
-        node_true = self.expression()
-        self.parser.check_current_token_is(Token.COLON)
-        self.parser.advance_token()  # skip :
-        node_false = self.ternary_expression()
-        return NodeTernary(self.ids_map_list, n, node_true, node_false)
+        # the ternary expressions that are chained in the false branch (a ? b : c ? d : e) are parsed in a loop
+        conditions_and_true_nodes = []
+        n = self.binary_operation()
+        while self.parser.current_token().type == Token.TERNARY:
+            self.parser.advance_token()  # skip ?
+            node_true = self.expression()
+            self.parser.check_current_token_is(Token.COLON)
+            self.parser.advance_token()  # skip :
+            conditions_and_true_nodes.append((n, node_true))
+            n = self.binary_operation()
+
+        # n is now the false branch of the last ternary expression
+        for condition, node_true in reversed(conditions_and_true_nodes):
+            n = NodeTernary(self.ids_map_list, condition, node_true, n)
+        return n
 
     def assignment(self):
         # assignment: ID ASSIGN expression | ID ASSIGN ARRAY_INITIALIZATION | ID (LBRACK expression RBRACK)+ ASSIGN expression | ternary_expression
 
         if self.parser.current_token().type == Token.ID and self.parser.next_token().type == Token.ASSIGN:
 
-            if self.parser.next_token(2).type in [Token.LBRACE, Token.STRING]:  # ID ASSIGN ARRAY_INITIALIZATION
+            if self.parser.next_token(2).type in ARRAY_INITIALIZATION_TYPES:  # ID ASSIGN ARRAY_INITIALIZATION
                 token_ID = self.parser.current_token()
                 self.parser.advance_token()  # skip ID
                 variable_ID = get_variable_from_ID_token(self.ids_map_list, token_ID)
@@ -634,7 +639,7 @@ class FunctionCompiler:
         # assignment (=, +=, -=, *=, /=, %=, <<=, >>=, &=, |=, ^=)
         # this is implemented using a Node class that represents a parse tree
 
-        parse_tree = self.expression()
+        parse_tree = self.expression().simplify()
         expression_code = parse_tree.get_code(self.current_stack_pointer())
         return expression_code
 
@@ -702,26 +707,26 @@ class FunctionCompiler:
 
         self.parser.advance_token()  # skip ;
 
-        code = expression_code  # after this, we point to next available cell
-        code += "<"  # point to value to return
-        code += get_move_to_return_value_cell_code(self.return_value_cell, self.current_stack_pointer())
+        code = [expression_code]  # after this, we point to next available cell
+        code.append("<")  # point to value to return
+        code.append(get_move_to_return_value_cell_code(self.return_value_cell, self.current_stack_pointer()))
 
-        return code
+        return "".join(code)
 
     # statements
     def compile_expression_as_statement(self):
         # this expression can be used as a statement.
         # e.g: x+=5;  or  x++ or ++x;
 
-        assert self.parser.current_token().type in [Token.ID, Token.INCREMENT, Token.DECREMENT, Token.UNARY_MULTIPLICATIVE]
+        assert self.parser.current_token().type == Token.ID or self.parser.current_token().type in UNARY_INCREMENT_TYPES
 
-        code = self.compile_expression()
+        code = [self.compile_expression()]
         self.parser.check_current_token_is(Token.SEMICOLON)
         self.parser.advance_token()  # skip ;
 
-        code += "<"  # discard the expression's value
+        code.append("<")  # discard the expression's value
 
-        return code
+        return "".join(code)
 
     def compile_print_string(self):
         # print(string);
@@ -741,9 +746,9 @@ class FunctionCompiler:
         self.parser.check_current_token_is(Token.SEMICOLON)
         self.parser.advance_token()  # skip ;
 
-        code = function_call_code  # at this point, we point to one after the return value
-        code += "<"  # discard return value
-        return code
+        code = [function_call_code]  # at this point, we point to one after the return value
+        code.append("<")  # discard return value
+        return "".join(code)
 
     def compile_if(self):
         # if (expression) statement (else statement)?   note - statement can be scope { }
@@ -765,32 +770,32 @@ class FunctionCompiler:
             inside_else_code = self.compile_statement()
         self.decrease_stack_pointer(amount=2)
 
-        code = expression_code  # evaluate expression. after this we point to "execute_else" cell
+        code = [expression_code]  # evaluate expression. after this we point to "execute_else" cell
         if have_else:
-            code += "[-]+"  # execute_else = 1
-        code += "<"  # point to the expression
-        code += "["  # if it is non-zero
-        code += ">"  # point to execute_else
+            code.append("[-]+")  # execute_else = 1
+        code.append("<")  # point to the expression
+        code.append("[")  # if it is non-zero
+        code.append(">")  # point to execute_else
         if have_else:
-            code += "-"  # execute_else = 0
-        code += ">"  # point to next available cell
-        code += inside_if_code  # after this we point to the same cell (one after execute_else)
-        code += "<<"  # point to expression
-        code += "[-]"  # expression = 0
-        code += "]"  # end if
+            code.append("-")  # execute_else = 0
+        code.append(">")  # point to next available cell
+        code.append(inside_if_code)  # after this we point to the same cell (one after execute_else)
+        code.append("<<")  # point to expression
+        code.append("[-]")  # expression = 0
+        code.append("]")  # end if
         # now we point to next available cell (what used to be expression_code)
 
         if have_else:
-            code += ">"  # point to execute_else
-            code += "["  # if it is non-zero
-            code += ">"  # point to next available cell
-            code += inside_else_code  # after this we point to the same cell (one after execute_else)
-            code += "<"  # point to execute_else
-            code += "-"  # execute_else = 0
-            code += "]"  # end if
-            code += "<"  # point to next available cell (what used to be expression_code)
+            code.append(">")  # point to execute_else
+            code.append("[")  # if it is non-zero
+            code.append(">")  # point to next available cell
+            code.append(inside_else_code)  # after this we point to the same cell (one after execute_else)
+            code.append("<")  # point to execute_else
+            code.append("-")  # execute_else = 0
+            code.append("]")  # end if
+            code.append("<")  # point to next available cell (what used to be expression_code)
 
-        return code
+        return "".join(code)
 
     def compile_while(self):  # while (expression) statement       note - statement can be scope { }
         self.parser.check_next_token_is(Token.LPAREN)
@@ -803,18 +808,18 @@ class FunctionCompiler:
 
         inner_scope_code = self.compile_statement()
 
-        code = expression_code  # evaluate expression
-        code += "<"  # point to the expression
-        code += "["  # if it is 0, jump to after the <while> scope
-        code += inner_scope_code  # <while> scope code. after this code, pointer points to the next available cell. i.e one after the expression
-        code += expression_code  # re-evaluate the expression
-        code += "<"  # point to the expression
-        code += "]"  # after <while> scope
+        code = [expression_code]  # evaluate expression
+        code.append("<")  # point to the expression
+        code.append("[")  # if it is 0, jump to after the <while> scope
+        code.append(inner_scope_code)  # <while> scope code. after this code, pointer points to the next available cell. i.e one after the expression
+        code.append(expression_code)  # re-evaluate the expression
+        code.append("<")  # point to the expression
+        code.append("]")  # after <while> scope
 
-        return code
+        return "".join(code)
 
     def compile_do_while(self):  # do statement while (expression) semicolon      note - statement can be scope { }
-        self.parser.check_current_token_is(Token.DO)
+        assert self.parser.current_token().type == Token.DO  # compile_statement only gets here on DO
         self.parser.advance_token()
 
         inner_scope_code = self.compile_statement()
@@ -827,14 +832,14 @@ class FunctionCompiler:
         self.parser.check_current_tokens_are([Token.RPAREN, Token.SEMICOLON])
         self.parser.advance_token(amount=2)  # point to after SEMICOLON
 
-        code = "[-]+"  # set expression to 1. since do while loops executes the scope code first.
-        code += "["  # go in scope
-        code += inner_scope_code  # <do-while> scope code. after this code, pointer points to the same cell. i.e the expression
-        code += expression_code  # evaluate the expression, after this code, the pointer is pointing to the next cell
-        code += "<"  # point to the expression
-        code += "]"  # after <do-while> scope
+        code = ["[-]+"]  # set expression to 1. since do while loops executes the scope code first.
+        code.append("[")  # go in scope
+        code.append(inner_scope_code)  # <do-while> scope code. after this code, pointer points to the same cell. i.e the expression
+        code.append(expression_code)  # evaluate the expression, after this code, the pointer is pointing to the next cell
+        code.append("<")  # point to the expression
+        code.append("]")  # after <do-while> scope
 
-        return code
+        return "".join(code)
 
     def compile_switch(self):  # switch (expression) { ((default | case literal): statements* break;? statements*)* }
         self.parser.check_current_tokens_are([Token.SWITCH, Token.LPAREN])
@@ -847,42 +852,46 @@ class FunctionCompiler:
 
         self.increase_stack_pointer()  # use 1 additional temp cell for indicating we need to execute a case
         cases = list()  # list of tuples: (value/"default" (int or string), case_code (string), has_break(bool))
+        seen_cases = set()  # the values of the cases above, for checking duplicates
+        parser, compile_statement = self.parser, self.compile_statement  # used for every statement inside the cases
 
-        while self.parser.current_token().type in [Token.CASE, Token.DEFAULT]:  # (default | CASE literal) COLON statement* break;? statements*
+        while self.parser.current_token().type in SWITCH_CASE_TYPES:  # (default | CASE literal) COLON statement* break;? statements*
             if self.parser.current_token().type == Token.CASE:
                 self.parser.advance_token()  # skip CASE
                 constant_value_token = self.parser.current_token()
-                if not is_token_literal(constant_value_token):
+                value = try_get_literal_token_value(constant_value_token)
+                if value is None:
                     raise BFSemanticError("Switch case value is not a literal. Token is %s" % constant_value_token)
 
-                value = get_literal_token_value(constant_value_token)
-                if value in [case for (case, _, _) in cases]:
+                if value in seen_cases:
                     raise BFSemanticError("Case %d already exists. Token is %s" % (value, constant_value_token))
             else:
                 assert self.parser.current_token().type == Token.DEFAULT
                 value = "default"
-                if value in [case for (case, _, _) in cases]:
+                if value in seen_cases:
                     raise BFSemanticError("default case %s already exists." % self.parser.current_token())
+            seen_cases.add(value)
 
             self.parser.check_next_token_is(Token.COLON)
             self.parser.advance_token(amount=2)  # point to after COLON
 
-            inner_case_code = ""
-            while self.parser.current_token().type not in [Token.CASE, Token.DEFAULT, Token.RBRACE, Token.BREAK]:
-                inner_case_code += self.compile_statement(allow_declaration=False)  # not allowed to declare variables directly inside case
+            inner_case_code = []
+            while parser.current_token().type not in CASE_STATEMENTS_END_TYPES:
+                inner_case_code.append(compile_statement(allow_declaration=False))  # not allowed to declare variables directly inside case
 
             has_break = False
             if self.parser.current_token().type == Token.BREAK:  # ignore all statements after break
                 self.parser.check_next_token_is(Token.SEMICOLON)
                 self.parser.advance_token(amount=2)  # skip break SEMICOLON
                 has_break = True
-                while self.parser.current_token().type not in [Token.CASE, Token.DEFAULT, Token.RBRACE]:
-                    self.compile_statement()  # advance the parser and discard the code
-            cases.append((value, inner_case_code, has_break))
+                # the statements after break are never executed, but they are still compiled so that their errors are reported
+                while parser.current_token().type not in CASE_END_TYPES:
+                    compile_statement()  # advance the parser and discard the code
+            cases.append((value, "".join(inner_case_code), has_break))
 
-        if self.parser.current_token().type not in [Token.CASE, Token.DEFAULT, Token.RBRACE]:
+        if self.parser.current_token().type not in CASE_END_TYPES:
             raise BFSyntaxError("Expected case / default / RBRACE (}) instead of token %s" % self.parser.current_token())
-        self.parser.check_current_token_is(Token.RBRACE)
+        assert self.parser.current_token().type == Token.RBRACE  # checked above
         self.parser.advance_token()
         self.decrease_stack_pointer(amount=2)
 
@@ -915,20 +924,22 @@ class FunctionCompiler:
         self.parser.advance_token(amount=2)  # skip for (
 
         manually_inserted_variable_in_for_definition = False
-        variable = None
-        code = ''
+        variable_size = 0
+        code = []
 
         
         self.add_ids_map()
         if self.parser.current_token().type == Token.INT:
             # we are defining a variable inside the for statement definition (for (int i = 0....))
-            variable = create_variable_from_definition(self.parser, advance_tokens=False)
+            variable = self.get_variable_from_definition_at(self.parser.current_token_index)
             self.insert_to_ids_map(variable)
             manually_inserted_variable_in_for_definition = True
-            code += ">" * get_variable_size(variable)
+            variable_size = get_variable_size(variable)
+            code.append(">" * variable_size)
 
-            show_side_effect_warning = self.parser.next_token(2).type != Token.ASSIGN
-            if self.parser.next_token(2).type == Token.LBRACK:
+            token_after_id_type = self.parser.next_token(2).type
+            show_side_effect_warning = token_after_id_type != Token.ASSIGN
+            if token_after_id_type == Token.LBRACK:
                 show_side_effect_warning = self.get_token_after_array_access(offset=1).type != Token.ASSIGN
 
             if show_side_effect_warning:
@@ -950,117 +961,100 @@ class FunctionCompiler:
         self.parser.check_current_token_is(Token.RPAREN)
         self.parser.advance_token()  # skip )
 
-        inner_scope_code = ""
+        inner_scope_code = []
         if self.parser.current_token().type == Token.LBRACE:  # do we have {} as for's statement?
             # compiling <for> scope inside { }:
             if manually_inserted_variable_in_for_definition:
-                inner_scope_code += "<" * get_variable_size(variable)
-            inner_scope_code += self.insert_scope_variables_into_ids_map()
-            inner_scope_code += self.compile_scope_statements()
+                inner_scope_code.append("<" * variable_size)
+            inner_scope_code.append(self.insert_scope_variables_into_ids_map())
+            self.compile_scope_statements(inner_scope_code)
         else:
-            inner_scope_code += self.compile_statement()
+            inner_scope_code.append(self.compile_statement())
         #  exit FOR scope 
-        inner_scope_code += self.exit_scope()
+        inner_scope_code.append(self.exit_scope())
         if manually_inserted_variable_in_for_definition:
-            inner_scope_code += ">" * get_variable_size(variable)
-
-        code += initial_statement
-        code += condition_expression  # evaluate expression
-        code += "<"  # point to the expression
-        code += "["  # if it is 0, jump to after the <for> scope
-        code += inner_scope_code  # <for> scope code
-        code += modification_expression
-        code += condition_expression  # re-evaluate the expression
-        code += "<"  # point to the expression
-        code += "]"  # after <for> scope
+            inner_scope_code.append(">" * variable_size)
+
+        code.append(initial_statement)
+        code.append(condition_expression)  # evaluate expression
+        code.append("<")  # point to the expression
+        code.append("[")  # if it is 0, jump to after the <for> scope
+        code.extend(inner_scope_code)  # <for> scope code
+        code.append(modification_expression)
+        code.append(condition_expression)  # re-evaluate the expression
+        code.append("<")  # point to the expression
+        code.append("]")  # after <for> scope
 
         if manually_inserted_variable_in_for_definition:
-            code += "<" * get_variable_size(variable)
+            code.append("<" * variable_size)
 
-        return code
+        return "".join(code)
 
     def compile_statement(self, allow_declaration=True):
         # returns code that performs the current statement
         # at the end, the pointer points to the same location it pointed before the statement was executed
 
         token = self.parser.current_token()
-        if token.type == Token.INT:  # INT ID ((= EXPRESSION) | ([NUM])+ (= ARRAY_INITIALIZATION)?)? SEMICOLON
+        statement_compiler = STATEMENT_COMPILERS.get(token.type)
+        if statement_compiler is not None:  # statements that are determined by their first token (if, while, return, ...)
+            return statement_compiler(self)
+
+        elif token.type == Token.INT:  # INT ID ((= EXPRESSION) | ([NUM])+ (= ARRAY_INITIALIZATION)?)? SEMICOLON
             if not allow_declaration:
                 raise BFSemanticError("Cannot define variable (%s) directly inside case. "
                                       "Can define inside new scope {} or outside the switch statement" % token)
             return self.compile_variable_declaration()
 
-        elif token.type in [Token.INCREMENT, Token.DECREMENT, Token.UNARY_MULTIPLICATIVE]:  # ++ID;
+        elif token.type in UNARY_INCREMENT_TYPES:  # ++ID;
             return self.compile_expression_as_statement()
 
         elif token.type == Token.ID:
-            if self.parser.next_token().type in [Token.ASSIGN, Token.LBRACK, Token.INCREMENT, Token.DECREMENT, Token.UNARY_MULTIPLICATIVE]:
+            next_token = self.parser.next_token()
+            if next_token.type in ID_EXPRESSION_STATEMENT_TYPES:
                 # ID ASSIGN expression; or ID([expression])+ ASSIGN expression; or ID++;
                 return self.compile_expression_as_statement()
-            elif self.parser.next_token().type == Token.LPAREN:  # ID(...);  (function call)
+            elif next_token.type == Token.LPAREN:  # ID(...);  (function call)
                 return self.compile_function_call_statement()
-            raise BFSyntaxError("Unexpected '%s' after '%s'. Expected '=|+=|-=|*=|/=|%%=|<<=|>>=|&=|(|=)|^=' (assignment), '++|--' (modification) or '(' (function call)" % (str(self.parser.next_token()), str(token)))
-
-        elif token.type == Token.PRINT:
-            return self.compile_print_string()
-
-        elif token.type == Token.IF:
-            return self.compile_if()
-
-        elif token.type == Token.LBRACE:
-            return self.compile_scope()
-
-        elif token.type == Token.WHILE:
-            return self.compile_while()
-
-        elif token.type == Token.DO:
-            return self.compile_do_while()
-
-        elif token.type == Token.SWITCH:
-            return self.compile_switch()
-
-        elif token.type == Token.BREAK:
-            return self.compile_break()
-
-        elif token.type == Token.RETURN:
-            return self.compile_return()
-
-        elif token.type == Token.FOR:
-            return self.compile_for()
+            raise BFSyntaxError("Unexpected '%s' after '%s'. Expected '=|+=|-=|*=|/=|%%=|<<=|>>=|&=|(|=)|^=' (assignment), '++|--' (modification) or '(' (function call)" % (str(next_token), str(token)))
 
         elif token.type == Token.SEMICOLON:
             # empty statement
             self.parser.advance_token()  # skip ;
             return ""
 
-        elif token.type in [Token.CASE, Token.DEFAULT]:
+        elif token.type in SWITCH_CASE_TYPES:
             raise BFSyntaxError("%s not inside a switch statement" % token)
 
         raise BFSyntaxError("Invalid statement at " + str(token))
 
-    def compile_scope_statements(self):
+    def compile_scope_statements(self, code):
+        # appends the code of each statement until the end of the scope to the list code (of the enclosing scope),
+        # so that the statements' code is only joined once, together with the code around it
+        # bind the parser and the methods to locals, since they are used for every statement
         tokens = self.tokens
+        parser, compile_statement, append_code = self.parser, self.compile_statement, code.append
+        RBRACE = Token.RBRACE
 
-        code = ''
-        while self.parser.current_token() is not None:
-            if self.parser.current_token().type == Token.RBRACE:
+        token = parser.current_token()
+        while token is not None:
+            if token.type == RBRACE:
                 # we reached the end of our scope
-                self.parser.advance_token()  # skip RBRACE
-                return code
-            else:
-                code += self.compile_statement()
+                parser.advance_token()  # skip RBRACE
+                return
+            append_code(compile_statement())
+            token = parser.current_token()
 
         # should never get here
-        raise BFSyntaxError("expected } after the last token in scope " + str(tokens[-1]))
+        raise BFSyntaxError("expected } after the last token in scope " + str(tokens[self.parser.end_index - 1]))
 
     def compile_scope(self):
         assert self.parser.current_token().type == Token.LBRACE
 
-        code = self.enter_scope()
-        code += self.compile_scope_statements()
-        code += self.exit_scope()
+        code = [self.enter_scope()]
+        self.compile_scope_statements(code)
+        code.append(self.exit_scope())
 
-        return code
+        return "".join(code)
 
     def compile_function_scope(self, parameters):
         # returns code for the current function
@@ -1101,9 +1095,24 @@ class FunctionCompiler:
                 """
         assert self.parser.current_token().type == Token.LBRACE
 
-        code = self.enter_function_scope(parameters)
-        code += self.compile_scope_statements()
-        code += self.exit_scope()
-        code += "<"  # point to return_value_cell
-
-        return code
+        code = [self.enter_function_scope(parameters)]
+        self.compile_scope_statements(code)
+        code.append(self.exit_scope())
+        code.append("<")  # point to return_value_cell
+
+        return "".join(code)
+
+
+# the methods that compile the statements which are determined by their first token
+# (defined after the class, so that it refers to the methods themselves)
+STATEMENT_COMPILERS = {
+    Token.PRINT: FunctionCompiler.compile_print_string,
+    Token.IF: FunctionCompiler.compile_if,
+    Token.LBRACE: FunctionCompiler.compile_scope,
+    Token.WHILE: FunctionCompiler.compile_while,
+    Token.DO: FunctionCompiler.compile_do_while,
+    Token.SWITCH: FunctionCompiler.compile_switch,
+    Token.BREAK: FunctionCompiler.compile_break,
+    Token.RETURN: FunctionCompiler.compile_return,
+    Token.FOR: FunctionCompiler.compile_for,
+}
@@ -1,6 +1,7 @@
 from .Exceptions import BFSyntaxError, BFSemanticError
 from .Token import Token
-from functools import reduce
+from functools import lru_cache
+from math import prod
 
 """
 This file holds functions that generate general Byteflow code
@@ -319,23 +320,17 @@ def get_token_ID_code(ids_map_list, token, current_pointer):
 def get_literal_token_code(token):
     # generate code that evaluates the token at the current pointer, and sets the pointer to point to the next available cell
     assert is_token_literal(token)
-    if token.type == Token.TRUE:
-        code = "[-]"  # zero current cell
-        code += "+"  # current cell = 1
-        code += ">"  # point to next cell
-        return code
+    return get_literal_value_code(get_literal_token_value(token))
 
-    elif token.type == Token.FALSE:
-        code = "[-]"  # zero current cell
-        code += ">"  # point to next cell
-        return code
 
-    else:
-        value = get_literal_token_value(token)
-        code = "[-]"  # zero current cell
-        code += get_set_cell_value_code(value, 0)  # set current cell to the value
-        code += ">"  # point to the next cell
-        return code
+@lru_cache(maxsize=256)
+def get_literal_value_code(value):
+    # generate code that sets the current cell to value, and sets the pointer to point to the next available cell
+    # the code depends only on the value, so it is cached for literals that repeat (e.g in array initializations)
+    code = "[-]"  # zero current cell
+    code += get_set_cell_value_code(value, 0)  # set current cell to the value
+    code += ">"  # point to the next cell
+    return code
 
 
 def get_divmod_code(right_token=None):
@@ -1121,7 +1116,10 @@ def get_op_boolean_operator_code(node, current_pointer):
 
 
 
+@lru_cache(maxsize=256)
 def get_print_string_code(string):
+    # the code depends only on the string, so it is cached for strings that are printed again
+    # (including every print inside a function, since functions are compiled again on every call)
     code = "[-]"  # zero the current cell
     code += ">[-]"  # zero the next cell (will be used for loop counts)
     code += "<"  # point to the original cell ("character" cell)
@@ -1192,6 +1190,11 @@ def get_move_left_index_cell_code():
 def get_literal_token_value(token):
     # known at compilation time
     assert is_token_literal(token)
+    return try_get_literal_token_value(token)
+
+
+def try_get_literal_token_value(token):
+    # returns the value of the token if it is a literal (known at compilation time), and None otherwise
     if token.type == Token.NUM:
         return get_NUM_token_value(token)
     elif token.type == Token.TRUE:
@@ -1200,6 +1203,7 @@ def get_literal_token_value(token):
         return 0
     elif token.type == Token.CHAR:
         return ord(token.data)
+    return None
 
 
 def get_NUM_token_value(token):
@@ -1214,17 +1218,17 @@ def get_NUM_token_value(token):
 
 
 def get_variable_from_ID_token(ids_map_list, ID_token):
-    ID = ID_token.data
-    # given an id, goes through the ids map list and returns the index of the first ID it finds
-    for i in range(len(ids_map_list)):
-        ids_map = ids_map_list[i].IDs_dict
-        if ID in ids_map:
-            return ids_map[ID]
-    raise BFSemanticError("'%s' does not exist" % str(ID_token))
+    # given an id, returns the variable it refers to in the innermost scope (the last ids map) of ids map list
+    # the innermost ids map refers to all the visible IDs (of that scope and its outer scopes), so there is no need to go through the list
+    # (IDs are resolved while their scope is the innermost one - before it is removed)
+    variable = ids_map_list[-1].visible_IDs.get(ID_token.data)
+    if variable is None:
+        raise BFSemanticError("'%s' does not exist" % str(ID_token))
+    return variable
 
 
 def dimensions_to_size(dimensions):
-    return reduce(lambda x, y: x * y, dimensions)
+    return prod(dimensions)
 
 
 def get_variable_dimensions_from_token(ids_map_list, ID_token):
@@ -1242,6 +1246,10 @@ def get_offset_to_variable(ids_map_list, ID_token, current_pointer):
     return offset
 
 
+# types of tokens with a value that is known at compilation time
+LITERAL_TYPES = frozenset((Token.TRUE, Token.FALSE, Token.NUM, Token.CHAR))
+
+
 def is_token_literal(token):
     # token with value that is known at compilation time
-    return token.type in [Token.TRUE, Token.FALSE, Token.NUM, Token.CHAR]
+    return token.type in LITERAL_TYPES
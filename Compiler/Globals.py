@@ -9,6 +9,7 @@ And related functions
 """
 
 global_variables = list()  # Global list of global variables
+global_variables_size = 0  # Total size of the global variables, updated on every insertion
 
 
 # variables
@@ -17,11 +18,13 @@ def get_global_variables():
 
 
 def insert_global_variable(variable):
+    global global_variables_size
     get_global_variables().append(variable)
+    global_variables_size += get_variable_size(variable)
 
 
 def get_global_variables_size():
-    return sum(get_variable_size(variable) for variable in get_global_variables())
+    return global_variables_size
 
 
 def create_variable(name, type, dimensions):
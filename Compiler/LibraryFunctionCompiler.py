@@ -1,3 +1,4 @@
+from functools import lru_cache
 from .Functions import insert_function_object
 from .Token import Token
 
@@ -113,15 +114,17 @@ def get_printchar_code():
     return code
 
 
-def insert_library_functions():
-    readint = LibraryFunctionCompiler("readint", Token.INT, list(), get_readint_code())
-    insert_function_object(readint)
-
-    printint = LibraryFunctionCompiler("printint", Token.VOID, [Token.INT], get_printint_code())
-    insert_function_object(printint)
+@lru_cache(maxsize=None)
+def get_library_functions():
+    # the library functions do not depend on the compiled program, so their code is generated only once
+    return (
+        LibraryFunctionCompiler("readint", Token.INT, list(), get_readint_code()),
+        LibraryFunctionCompiler("printint", Token.VOID, [Token.INT], get_printint_code()),
+        LibraryFunctionCompiler("readchar", Token.INT, list(), get_readchar_code()),
+        LibraryFunctionCompiler("printchar", Token.VOID, [Token.INT], get_printchar_code()),
+    )
 
-    readchar = LibraryFunctionCompiler("readchar", Token.INT, list(), get_readchar_code())
-    insert_function_object(readchar)
 
-    printchar = LibraryFunctionCompiler("printchar", Token.VOID, [Token.INT], get_printchar_code())
-    insert_function_object(printchar)
+def insert_library_functions():
+    for function in get_library_functions():
+        insert_function_object(function)
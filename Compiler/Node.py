@@ -1,9 +1,10 @@
+from functools import lru_cache
 from .Exceptions import BFSemanticError
 from .General import get_copy_from_variable_code, get_copy_to_variable_code
 from .General import get_move_left_index_cell_code, get_move_right_index_cells_code
-from .General import get_offset_to_variable, get_variable_dimensions_from_token
+from .General import get_offset_to_variable, get_variable_dimensions_from_token, get_variable_from_ID_token
 from .General import get_op_between_literals_code, get_literal_token_code, get_token_ID_code
-from .General import get_unary_prefix_op_code, get_unary_postfix_op_code, is_token_literal
+from .General import get_unary_prefix_op_code, get_unary_postfix_op_code, is_token_literal, try_get_literal_token_value
 from .General import unpack_literal_tokens_to_array_dimensions, get_op_boolean_operator_code
 from .Token import Token
 
@@ -12,6 +13,13 @@ This file holds classes that are used to create the parse tree of expressions
 Each class implements a get_code() function that receives a "stack pointer" and returns code that evaluates the expression
 """
 
+# the token types of operations that evaluate both operands and then apply the operation on them
+BINARY_OPERATION_TYPES = frozenset((Token.BINOP, Token.RELOP, Token.BITWISE_SHIFT, Token.BITWISE_AND, Token.BITWISE_OR, Token.BITWISE_XOR))
+# the BINOP operators that NodeToken.simplify has rules for
+SIMPLIFIED_BINOP_OPERATORS = frozenset(("+", "-", "*"))
+# the operators (BINOP and ASSIGN) whose right operand is a divisor
+DIVISION_OPERATORS = frozenset(("/", "%", "/=", "%="))
+
 
 class Node:
     def __init__(self, ids_map_list):
@@ -38,6 +46,18 @@ class Node:
         op_node = NodeToken(self.ids_map_list, token=op_token)
         return op_node
 
+    def simplify(self):
+        # returns a node that evaluates to the same value, and may generate less code
+        return self
+
+    def literal_value(self):
+        # returns the value of this node if it is known at compilation time, otherwise None
+        return None
+
+    def is_side_effect_free(self):
+        # returns True if evaluating this node changes nothing but the cells it evaluates into
+        return False
+
     def get_code(self, *args, **kwargs):
         pass
 
@@ -49,6 +69,57 @@ class NodeToken(Node):
         self.right = right
         self.token = token
 
+    def literal_value(self):
+        return try_get_literal_token_value(self.token)
+
+    def is_side_effect_free(self):
+        # a literal or an ID - so it is safe to not evaluate it
+        if self.token.type == Token.ID:
+            get_variable_from_ID_token(self.ids_map_list, self.token)  # still report an ID that does not exist
+            return True
+        return is_token_literal(self.token)
+
+    def simplify(self):
+        """
+        simplifies the sub-trees first, and then this node, using the rules:
+        x + 0, 0 + x, x - 0, x * 1, 1 * x  ->  x
+        x * 0, 0 * x, x - x  ->  0 (only if x is a literal or an ID, so dropping it does not drop a side effect)
+        (except for a divisor, which is not simplified to 0)
+        """
+        if self.left is not None:
+            self.left = self.left.simplify()
+        if self.right is not None:
+            right = self.right.simplify()
+            # a divisor that is simplified to 0 (e.g x * 0) is kept as it is, since dividing by a literal 0 is a compilation error
+            if right.literal_value() != 0 or self.right.literal_value() == 0 or self.token.data not in DIVISION_OPERATORS:
+                self.right = right
+
+        if self.token.type != Token.BINOP or self.token.data not in SIMPLIFIED_BINOP_OPERATORS:
+            return self
+
+        left, right, op = self.left, self.right, self.token.data
+        left_value, right_value = left.literal_value(), right.literal_value()
+
+        if op == "+" or op == "-":
+            if right_value == 0:
+                return left
+            if op == "+" and left_value == 0:
+                return right
+            if op == "-" and isinstance(left, NodeToken) and isinstance(right, NodeToken) and \
+                    left.token.type == Token.ID and right.token.type == Token.ID and left.token.data == right.token.data and \
+                    left.is_side_effect_free():
+                return get_NUM_node(0)
+
+        else:  # op == "*"
+            if right_value == 1:
+                return left
+            if left_value == 1:
+                return right
+            if (right_value == 0 and left.is_side_effect_free()) or (left_value == 0 and right.is_side_effect_free()):
+                return get_NUM_node(0)
+
+        return self
+
     def get_code(self, current_pointer, *args, **kwargs):
         # returns the code that evaluates the parse tree
 
@@ -60,17 +131,28 @@ class NodeToken(Node):
             else:
                 return get_literal_token_code(self.token)
 
-        elif self.token.type in [Token.BINOP, Token.RELOP, Token.BITWISE_SHIFT, Token.BITWISE_AND, Token.BITWISE_OR, Token.BITWISE_XOR]:
-            code = self.left.get_code(current_pointer)
-            code += self.right.get_code(current_pointer + 1)
-            code += "<<"  # point to the first operand
-
-            right_token = None
-            if isinstance(self.right, NodeToken):
-                right_token = self.right.token
-
-            code += get_op_between_literals_code(self.token, right_token)
-            return code
+        elif self.token.type in BINARY_OPERATION_TYPES:
+            # left-associative chains (e.g a + b - c * d + ...) are nested on the left side
+            # so instead of recursing into the left operand, go down to the first operand of the chain
+            # and then append the code of the operations from the innermost one outwards
+            operation_nodes = []
+            node = self
+            while isinstance(node, NodeToken) and node.token.type in BINARY_OPERATION_TYPES:
+                operation_nodes.append(node)
+                node = node.left
+
+            code = [node.get_code(current_pointer)]
+            for operation_node in reversed(operation_nodes):
+                right = operation_node.right
+                code.append(right.get_code(current_pointer + 1))
+                code.append("<<")  # point to the first operand
+
+                right_token = None
+                if isinstance(right, NodeToken):
+                    right_token = right.token
+
+                code.append(get_op_between_literals_code(operation_node.token, right_token))
+            return "".join(code)
 
         elif self.token.type in [Token.AND, Token.OR]:  # short-circuit evaluation treated differently
             return get_op_boolean_operator_code(self, current_pointer)
@@ -105,6 +187,16 @@ class NodeToken(Node):
                 return assignment_node.get_code(current_pointer)
 
 
+@lru_cache(maxsize=1024)
+def get_NUM_node(value):
+    """
+    returns a literal node of the number value, for constants that the compiler creates (e.g array index calculations)
+    the node is shared by every expression that uses the same constant, so it must never be modified
+    its code does not depend on any variable, so it holds an empty ids map list
+    """
+    return NodeToken([], token=Token(Token.NUM, 0, 0, data=str(value)))
+
+
 class NodeTernary(Node):
     def __init__(self, ids_map_list, condition, node_true, node_false):
         # node_condition ? node_true : node_false;
@@ -391,8 +483,7 @@ class NodeArrayAssignment(Node):
 
         offset = get_offset_to_variable(self.ids_map_list, self.token_id, current_pointer)
         code = "<" * offset  # point to first array element
-        for literal in unpacked_literals_list:
-            code += get_literal_token_code(literal)  # evaluate this literal and point to next array element
+        code += "".join(map(get_literal_token_code, unpacked_literals_list))  # evaluate each literal and point to next array element
         code += ">" * (offset - len(unpacked_literals_list))  # move back to the original position
         code += ">"  # point to the next cell
         return code
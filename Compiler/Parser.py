@@ -7,16 +7,25 @@ class Parser:
     """
     Used to easily iterate tokens
     """
-    def __init__(self, tokens):
+    # opening bracket type -> closing bracket type
+    MATCHING_BRACKETS = {Token.LBRACE: Token.RBRACE, Token.LBRACK: Token.RBRACK, Token.LPAREN: Token.RPAREN}
+
+    def __init__(self, tokens, start_index=0, end_index=None):
+        """
+        tokens can be shared with other parsers (they are never modified)
+        this parser only handles tokens[start_index:end_index]
+        """
         self.tokens = tokens
-        self.current_token_index = 0
+        self.start_index = start_index
+        self.current_token_index = start_index
+        self.end_index = len(tokens) if end_index is None else end_index
+        self.matching_indices = None  # found on the first call to find_matching (a function that is never called doesn't need it)
 
     # parsing tokens
     def current_token(self):
-        if self.current_token_index >= len(self.tokens):
-            return None
-        else:
-            return self.token_at_index(self.current_token_index)
+        # reads the token directly (instead of through token_at_index), since it is called for almost every token
+        index = self.current_token_index
+        return self.tokens[index] if index < self.end_index else None
 
     def advance_token(self, amount=1):
         self.current_token_index += amount
@@ -25,12 +34,38 @@ class Parser:
         self.current_token_index = token_index
 
     def token_at_index(self, index):
-        assert index < len(self.tokens)
+        assert index < self.end_index
         return self.tokens[index]
 
     def next_token(self, next_amount=1):
         return self.token_at_index(self.current_token_index + next_amount)
 
+    def find_matching_indices(self):
+        """
+        :return: a dict that maps the index of every opening bracket ({, [, or () handled by this parser,
+        to the index of its matching closing bracket. each kind of bracket is matched separately of the others
+
+        this is done in a single pass, so that find_matching does not need to count brackets on every call
+        """
+        tokens = self.tokens
+        # closing bracket type -> the indices of the opening brackets of that kind that are not matched yet
+        open_brackets_indices = {closing: [] for closing in Parser.MATCHING_BRACKETS.values()}
+        opening_to_open_brackets_indices = {opening: open_brackets_indices[closing] for opening, closing in Parser.MATCHING_BRACKETS.items()}
+
+        matching_indices = dict()
+        for i in range(self.start_index, self.end_index):
+            token_type = tokens[i].type
+
+            if token_type in opening_to_open_brackets_indices:
+                opening_to_open_brackets_indices[token_type].append(i)
+
+            elif token_type in open_brackets_indices:
+                indices = open_brackets_indices[token_type]
+                if indices:
+                    matching_indices[indices.pop()] = i
+
+        return matching_indices
+
     def find_matching(self, starting_index=None):
         """
         :return: the index of the token that matches the current token
@@ -42,41 +77,53 @@ class Parser:
         if starting_index is None:
             starting_index = self.current_token_index
 
-        tokens = self.tokens
-        token_to_match = tokens[starting_index]
-        if token_to_match.type == Token.LBRACE:
-            inc = Token.LBRACE
-            dec = Token.RBRACE
-        elif token_to_match.type == Token.LBRACK:
-            inc = Token.LBRACK
-            dec = Token.RBRACK
-        elif token_to_match.type == Token.LPAREN:
-            inc = Token.LPAREN
-            dec = Token.RPAREN
-        else:
+        token_to_match = self.tokens[starting_index]
+        if token_to_match.type not in Parser.MATCHING_BRACKETS:
             raise BFSemanticError("No support for matching %s" % str(token_to_match))
 
-        i = starting_index
-        cnt = 0
-        while i < len(tokens):
-            if tokens[i].type == inc:
-                cnt += 1
-            elif tokens[i].type == dec:
-                cnt -= 1
+        if self.matching_indices is None:
+            self.matching_indices = self.find_matching_indices()
+        matching_index = self.matching_indices.get(starting_index)
+        if matching_index is None:
+            raise BFSyntaxError("Did not find matching %s for %s" % (Parser.MATCHING_BRACKETS[token_to_match.type], str(token_to_match)))
+        return matching_index
+
+    def find_scopes_variable_definitions(self):
+        """
+        :return: a dict that maps the index of every LBRACE from the current token onwards, to a list of the indices of
+        the INT tokens that define variables directly in its scope (not in sub-scopes, and not in a FOR statement)
+
+        this is done in a single pass, so that entering a scope does not require going through all of its tokens
+        """
+        tokens = self.tokens
+        INT, FOR, LBRACE, RBRACE = Token.INT, Token.FOR, Token.LBRACE, Token.RBRACE
+
+        scopes_variable_definitions = dict()
+        open_scopes_definitions = []  # the definitions lists of the scopes that contain the current token
+        for i in range(self.current_token_index, self.end_index):
+            token_type = tokens[i].type
+
+            if token_type == LBRACE:
+                scope_definitions = []
+                scopes_variable_definitions[i] = scope_definitions
+                open_scopes_definitions.append(scope_definitions)
 
-            if cnt == 0:
-                return i
+            elif token_type == RBRACE:
+                if open_scopes_definitions:
+                    open_scopes_definitions.pop()
 
-            i += 1
+            elif token_type == INT and open_scopes_definitions:
+                if tokens[i-2].type != FOR:  # if it is not a definition inside a FOR statement (for (int i = 0...))
+                    open_scopes_definitions[-1].append(i)
 
-        raise BFSyntaxError("Did not find matching %s for %s" % (dec, str(token_to_match)))
+        return scopes_variable_definitions
 
     def check_next_tokens_are(self, tokens_list, starting_index=None):
         if starting_index is None:
             starting_index = self.current_token_index
 
         # used for "assertion" and print a nice message to the user
-        if starting_index + len(tokens_list) >= len(self.tokens):
+        if starting_index + len(tokens_list) >= self.end_index:
             raise BFSyntaxError("Expected %s after %s" % (str(tokens_list), str(self.tokens[starting_index])))
         for i in range(0, len(tokens_list)):
             if self.tokens[starting_index + 1 + i].type != tokens_list[i]: